@@ -2,12 +2,82 @@ import os
 import sys
 import json
 import shutil
+import importlib
 import multiprocessing as mp
 import time
 from pathlib import Path
 from map import Mapper
 from reduce import Reducer
 
+class MapperFailure(Exception):
+    """
+    Raised inside a pool worker to simulate a mapper crash.
+    """
+
+    def __init__(self, idx):
+        super().__init__(idx)
+        self.idx = idx
+
+    def __str__(self):
+        return f'Mapper {self.idx} failed'
+
+def resolve_function(function_spec):
+    """
+    Resolves a user function given either a callable or a
+    "module:function" string.
+
+    The string form is resolved by importing the module, so it stays a
+    tiny pickle in the task payload and also covers functions that
+    cannot be pickled directly (lambdas, closures). Strings without a
+    colon (the ReducerOps built-in names) pass through untouched.
+
+    Args:
+        function_spec: Callable, "module:function" string, or None.
+
+    Returns:
+        The resolved callable, or the spec unchanged if not a
+        "module:function" string.
+    """
+    if isinstance(function_spec, str) and ':' in function_spec:
+        module_name, _, function_name = function_spec.partition(':')
+        return getattr(importlib.import_module(module_name), function_name)
+    return function_spec
+
+def _run_mapper(task):
+    """
+    Pool worker entry point running a single mapper task.
+
+    Args:
+        task (tuple): (idx, input_file, intermediate_dir, map_function,
+            num_reducers, combine_function, simulate_failure).
+
+    Returns:
+        tuple: (idx, list of reducer ids the mapper produced data for).
+    """
+    idx, input_file, intermediate_dir, map_function, num_reducers, combine_function, simulate_failure = task
+    if simulate_failure:
+        print(f"Simulating failure of Mapper {idx}")
+        raise MapperFailure(idx)
+    mapper = Mapper(input_file, intermediate_dir, resolve_function(map_function), idx,
+                    num_reducers, resolve_function(combine_function))
+    return idx, mapper.start_mapper()
+
+def _run_reducer(task):
+    """
+    Pool worker entry point running a single reducer task.
+
+    Args:
+        task (tuple): (idx, intermediate_dir, output_dir, reduce_function,
+            num_mappers, reduce_kind).
+
+    Returns:
+        int: The reducer's id.
+    """
+    idx, intermediate_dir, output_dir, reduce_function, num_mappers, reduce_kind = task
+    reducer = Reducer(intermediate_dir, output_dir, resolve_function(reduce_function), idx, num_mappers, reduce_kind)
+    reducer.start_reducer()
+    return idx
+
 def read_configs(file_path):
     """
     Reads configuration parameters from a JSON file.
@@ -29,7 +99,7 @@ def read_configs(file_path):
 
     return input_file, num_mappers, num_reducers
 
-def initialize_master(num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx):
+def initialize_master(num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx, user_defined_combine=None, reduce_kind=None):
     """
     Initializes the Master process and starts the MapReduce job.
 
@@ -37,11 +107,18 @@ def initialize_master(num_mappers, num_reducers, input_file, user_defined_map, u
         num_mappers (int): Number of mapper processes.
         num_reducers (int): Number of reducer processes.
         input_file (str): Path to the input data file.
-        user_defined_map (function): User-defined map function.
-        user_defined_reduce (function): User-defined reduce function.
+        user_defined_map: User-defined map function, as a callable or a
+            "module:function" string resolved in the workers.
+        user_defined_reduce: User-defined reduce function, callable or
+            "module:function" string; may also be a ReducerOps constant
+            to run a built-in reduction.
         kill_idx (int): Index of the mapper to simulate failure (for fault tolerance).
+        user_defined_combine: Optional associative and commutative combiner
+            applied map-side, callable or "module:function" string.
+        reduce_kind (str): Optional built-in reduction ('sum', 'count',
+            'max' or 'min') run in place of the reduce function.
     """
-    master_instance = Master(num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx)
+    master_instance = Master(num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx, user_defined_combine, reduce_kind)
     master_instance.start_process()
 
 class Master:
@@ -49,7 +126,7 @@ class Master:
     Master class orchestrates the MapReduce job by managing mappers and reducers.
     """
 
-    def __init__(self, num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx):
+    def __init__(self, num_mappers, num_reducers, input_file, user_defined_map, user_defined_reduce, kill_idx, user_defined_combine=None, reduce_kind=None):
         """
         Initializes the Master with the necessary configuration.
 
@@ -60,13 +137,16 @@ class Master:
             user_defined_map (function): User-defined map function.
             user_defined_reduce (function): User-defined reduce function.
             kill_idx (int): Index of the mapper to simulate failure.
+            user_defined_combine (function): Optional map-side combiner.
+            reduce_kind (str): Optional built-in reduction name.
         """
         self.num_mappers = num_mappers
         self.num_reducers = num_reducers
         self.input_file = os.path.abspath(input_file)
         self.user_defined_map = user_defined_map
         self.user_defined_reduce = user_defined_reduce
-        self.timeout = 3
+        self.user_defined_combine = user_defined_combine
+        self.reduce_kind = reduce_kind
         self.kill_idx = kill_idx
 
         # Generate a unique job ID
@@ -77,120 +157,120 @@ class Master:
         # Split input data for mappers
         self.split_input_data()
 
-    def split_input_data(self):
+        # One pool is created up front and reused for both phases;
+        # re-creating it per phase would pay a second fork/teardown cycle.
+        self.pool_size = min(max(self.num_mappers, self.num_reducers), mp.cpu_count())
+        self.pool = mp.get_context("fork").Pool(self.pool_size)
+
+    def split_input_data(self, read_chunk_size=1 << 20, flush_threshold=1024):
         """
         Splits the input data among the mappers.
+
+        Reads the input in large chunks and keeps one open, buffered writer
+        per shard so the split is a handful of bulk writes instead of an
+        open/write/close cycle per input line.
+
+        Args:
+            read_chunk_size (int): Number of characters read per chunk.
+            flush_threshold (int): Buffered lines per shard before a flush.
         """
         split_dir = f"{self.TMP_DIR}/input"
         os.makedirs(split_dir, exist_ok=True)
 
-        with open(self.input_file, 'r') as reader:
-            for idx, line in enumerate(reader):
-                if not line.endswith('\n'):
-                    line += '\n'
-                mapper_id = idx % self.num_mappers
-                mapper_file = os.path.join(split_dir, f'{mapper_id}.txt')
-                with open(mapper_file, 'a') as writer:
-                    writer.write(line)
+        writers = [open(os.path.join(split_dir, f'{i}.txt'), 'w', buffering=1 << 20)
+                   for i in range(self.num_mappers)]
+        buffers = [[] for _ in range(self.num_mappers)]
+        try:
+            with open(self.input_file, 'r') as reader:
+                idx = 0
+                remainder = ''
+                while True:
+                    chunk = reader.read(read_chunk_size)
+                    if not chunk:
+                        break
+                    lines = (remainder + chunk).splitlines(keepends=True)
+                    # The chunk boundary may fall mid-line; carry the tail over.
+                    if lines and not lines[-1].endswith('\n'):
+                        remainder = lines.pop()
+                    else:
+                        remainder = ''
+                    for line in lines:
+                        mapper_id = idx % self.num_mappers
+                        buffer = buffers[mapper_id]
+                        buffer.append(line)
+                        if len(buffer) >= flush_threshold:
+                            writers[mapper_id].writelines(buffer)
+                            buffer.clear()
+                        idx += 1
+                if remainder:
+                    buffers[idx % self.num_mappers].append(remainder + '\n')
+            for writer, buffer in zip(writers, buffers):
+                writer.writelines(buffer)
+        finally:
+            for writer in writers:
+                writer.close()
         self.input_files = [os.path.join(split_dir, f'{i}.txt') for i in range(self.num_mappers)]
 
-    def retry_mapper(self, idx):
+    def run_mappers(self):
+        """
+        Runs the map phase on the pool, resubmitting simulated failures.
         """
-        Restarts a mapper process in case of failure.
+        pool = self.pool
+        intermediate_dir = f'{self.TMP_DIR}/intermediate'
+        tasks = [(idx, input_file, intermediate_dir, self.user_defined_map,
+                  self.num_reducers, self.user_defined_combine, idx == self.kill_idx)
+                 for idx, input_file in enumerate(self.input_files)]
+        chunksize = max(1, len(tasks) // (self.pool_size + 2))
+        results = pool.imap_unordered(_run_mapper, tasks, chunksize=chunksize)
+        completed = set()
+        while True:
+            try:
+                idx, reducer_ids = next(results)
+            except StopIteration:
+                break
+            except MapperFailure as failure:
+                print(f"Mapper {failure.idx} has crashed, restarting...")
+                continue
+            completed.add(idx)
+            self.active_reducers += reducer_ids
+        # A raising task aborts its whole imap chunk: chunk-mates after it
+        # never run and results of those before it are discarded with the
+        # chunk. Resubmit every task whose result never arrived, not just
+        # the one that raised.
+        retries = [pool.apply_async(_run_mapper, (tasks[idx][:-1] + (False,),))
+                   for idx in range(len(tasks)) if idx not in completed]
+        for retry in retries:
+            idx, reducer_ids = retry.get()
+            self.active_reducers += reducer_ids
 
-        Args:
-            idx (int): Index of the mapper to restart.
+    def run_reducers(self):
         """
-        print(f"Mapper {idx} has crashed, restarting...")
-        self.processes[idx].terminate()
-        self.status_queues[idx] = mp.Queue()
-        self.reducer_queues[idx] = mp.Queue()
-        self.processes[idx] = mp.Process(target=self.mappers[idx].start_mapper, args=(self.reducer_queues[idx], self.status_queues[idx]))
-        self.processes[idx].start()
+        Runs the reduce phase on the pool.
+        """
+        pool = self.pool
+        tasks = [(idx, f'{self.TMP_DIR}/intermediate', self.OUT_DIR,
+                  self.user_defined_reduce, self.num_mappers, self.reduce_kind)
+                 for idx in range(self.num_reducers)]
+        chunksize = max(1, len(tasks) // (self.pool_size + 2))
+        for _ in pool.imap_unordered(_run_reducer, tasks, chunksize=chunksize):
+            pass
 
     def start_process(self):
         """
-        Starts mapper and reducer processes and monitors their execution.
+        Runs the map and reduce phases on a worker pool.
         """
-        print("Starting Mappers...")
-        self.mappers = []
-        self.processes = []
-        self.reducer_queues = []
-        self.status_queues = []
-        self.mapper_status = [True] * self.num_mappers
         self.active_reducers = []
+        try:
+            print("Starting Mappers...")
+            self.run_mappers()
 
-        # Initialize and start mapper processes
-        for idx, input_file in enumerate(self.input_files):
-            mapper = Mapper(input_file, f'{self.TMP_DIR}/intermediate', self.user_defined_map, idx, self.num_reducers)
-            self.mappers.append(mapper)
-            status_queue = mp.Queue()
-            reducer_queue = mp.Queue()
-            process = mp.Process(target=mapper.start_mapper, args=(reducer_queue, status_queue))
-            self.status_queues.append(status_queue)
-            self.reducer_queues.append(reducer_queue)
-            self.processes.append(process)
-            process.start()
-
-            # Simulate failure for fault tolerance testing
-            if self.kill_idx == idx:
-                print(f"Simulating failure of Mapper {idx}")
-                process.terminate()
-
-        # Monitor mapper processes
-        self.monitor_mappers()
-
-        print("Starting Reducers...")
-        # Initialize and start reducer processes
-        self.reducers = []
-        self.reducer_processes = []
-        self.reducer_status_queues = []
-        self.reducer_status = [True] * self.num_reducers
-
-        for idx in range(self.num_reducers):
-            reducer = Reducer(f'{self.TMP_DIR}/intermediate', self.OUT_DIR, self.user_defined_reduce, idx, self.num_mappers)
-            self.reducers.append(reducer)
-            status_queue = mp.Queue()
-            process = mp.Process(target=reducer.start_reducer, args=(status_queue,))
-            self.reducer_status_queues.append(status_queue)
-            self.reducer_processes.append(process)
-            process.start()
-
-        # Monitor reducer processes
-        self.monitor_reducers()
-
-        print(f"MapReduce job completed. Output is available at '{self.OUT_DIR}'")
-        # Clean up temporary files
-        shutil.rmtree(self.TMP_DIR)
-
-    def monitor_mappers(self):
-        """
-        Monitors mapper processes for completion or failure.
-        """
-        while any(self.mapper_status):
-            for idx, status in enumerate(self.mapper_status):
-                if status:
-                    try:
-                        curr_status, _ = self.status_queues[idx].get(timeout=self.timeout)
-                        if curr_status == 'D':
-                            self.mapper_status[idx] = False
-                            self.active_reducers += self.reducer_queues[idx].get()
-                            self.processes[idx].join()
-                    except Exception:
-                        self.retry_mapper(idx)
-
-    def monitor_reducers(self):
-        """
-        Monitors reducer processes for completion.
-        """
-        while any(self.reducer_status):
-            for idx, status in enumerate(self.reducer_status):
-                if status:
-                    try:
-                        curr_status, _ = self.reducer_status_queues[idx].get(timeout=self.timeout)
-                        if curr_status == 'D':
-                            self.reducer_status[idx] = False
-                            self.reducer_processes[idx].join()
-                    except Exception:
-                        pass  # In a real-world scenario, implement retry logic here
+            print("Starting Reducers...")
+            self.run_reducers()
+
+            print(f"MapReduce job completed. Output is available at '{self.OUT_DIR}'")
+            # Clean up temporary files
+            shutil.rmtree(self.TMP_DIR)
+        finally:
+            self.pool.close()
+            self.pool.join()
 
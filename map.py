@@ -1,6 +1,5 @@
-import json
-import time
 import os
+import pickle
 from collections import defaultdict
 
 class Mapper:
@@ -8,7 +7,7 @@ class Mapper:
     Mapper class that processes input data and emits intermediate key-value pairs.
     """
 
-    def __init__(self, input_path, output_path, map_function, mapper_id, num_reducers):
+    def __init__(self, input_path, output_path, map_function, mapper_id, num_reducers, combine_function=None):
         """
         Initializes the Mapper.
 
@@ -18,55 +17,113 @@ class Mapper:
             map_function (function): User-defined map function.
             mapper_id (int): Unique identifier for the mapper.
             num_reducers (int): Total number of reducers.
+            combine_function (function): Optional combiner applied to each
+                key's values before they are written out. Must be
+                associative and commutative, since reducers apply the
+                reduce function again over the combined values.
         """
         self.id = mapper_id
         self.input_path = input_path
         self.output_path = output_path
         self.map_function = map_function
+        self.combine_function = combine_function
         self.num_reducers = num_reducers
-        self.status = 'I'  # Status: 'I' for In-progress, 'D' for Done
         self.reducer_ids = []
-        with open(self.input_path, 'r') as reader:
-            self.input_data = reader.readlines()
 
-    def emit_intermediate(self, key, value):
+    def combine(self):
         """
-        Emits an intermediate key-value pair.
-
-        Args:
-            key: Intermediate key.
-            value: Intermediate value.
+        Collapses each key's values to a single combined value, shrinking
+        the intermediate data before it is written and shuffled.
         """
-        reducer_id = hash(key) % self.num_reducers
-        self.map_data[reducer_id][key].append(value)
+        for key, values in self.map_data.items():
+            self.map_data[key] = [self.combine_function(key, values)]
 
     def write_data(self):
         """
         Writes the intermediate data to output files for reducers.
+
+        Each partition is written as a stream of pickled (key, values)
+        records sorted by key, so reducers can read record by record
+        without a text parse; pickle frames are self-delimiting. The
+        records are still joined into one contiguous buffer and written
+        with a single write() per shard file.
         """
         os.makedirs(self.output_path, exist_ok=True)
-        for reducer_id in self.map_data:
-            out_file = os.path.join(self.output_path, f'm{self.id}r{reducer_id}.txt')
+        num_reducers = self.num_reducers
+        buckets = [{} for _ in range(num_reducers)]
+        if num_reducers & (num_reducers - 1) == 0:
+            # Power-of-two reducer counts partition with a bitmask, which
+            # picks the same bucket as % but dispatches faster. Python's %
+            # is always non-negative, so the two agree on negative hashes.
+            mask = num_reducers - 1
+            for key, values in self.map_data.items():
+                buckets[hash(key) & mask][key] = values
+        else:
+            for key, values in self.map_data.items():
+                buckets[hash(key) % num_reducers][key] = values
+        # The buckets now own the map output; releasing the flat dict lets
+        # each partition be freed individually once written.
+        self.map_data = None
+        # The path template is constant across partitions; joining it once
+        # leaves only the reducer id to format inside the loop.
+        path_prefix = os.path.join(self.output_path, f'm{self.id}r')
+        for reducer_id, partition in enumerate(buckets):
+            if not partition:
+                continue
+            out_file = f'{path_prefix}{reducer_id}.pkl'
             self.reducer_ids.append(reducer_id)
-            with open(out_file, 'w') as outfile:
-                json.dump(self.map_data[reducer_id], outfile)
+            payload = b''.join(pickle.dumps(record, protocol=pickle.HIGHEST_PROTOCOL)
+                               for record in sorted(partition.items()))
+            partition.clear()
+            fd = os.open(out_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+            try:
+                written = 0
+                while written < len(payload):
+                    written += os.write(fd, payload[written:])
+            finally:
+                if hasattr(os, 'posix_fadvise'):
+                    # Written once, read once by a reducer: let the kernel
+                    # drop the pages instead of keeping them cached.
+                    os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+                os.close(fd)
 
-    def start_mapper(self, active_reducers_queue, status_queue):
+    def start_mapper(self):
         """
-        Starts the mapper process.
+        Runs the map task.
 
-        Args:
-            active_reducers_queue (multiprocessing.Queue): Queue to communicate active reducers.
-            status_queue (multiprocessing.Queue): Queue to communicate status updates.
+        Returns:
+            list: Ids of the reducers this mapper produced data for.
         """
-        self.map_data = defaultdict(lambda: defaultdict(list))
-        status_queue.put(['I', time.time()])
+        # The shard is read here, in the worker process, rather than in
+        # __init__: constructing a Mapper stays cheap and no shard data
+        # ever has to cross a process boundary with the instance. One
+        # read() plus splitlines() avoids materializing a separate str
+        # per line up front the way readlines() does.
+        with open(self.input_path, 'r') as reader:
+            raw = reader.read()
+
+        self.map_data = defaultdict(list)
+
+        # The emit callback closes over locals: attribute lookups on self
+        # are hoisted out of the per-pair hot path. Keys go into one flat
+        # defaultdict (a single hashed lookup per emit, insert or not);
+        # partitioning by reducer happens in write_data.
+        map_data = self.map_data
+        map_function = self.map_function
+
+        def emit(key, value):
+            map_data[key].append(value)
+
+        for idx, line in enumerate(raw.splitlines()):
+            map_function(idx, line, emit)
+
+        if self.combine_function is not None:
+            self.combine()
 
-        for idx, line in enumerate(self.input_data):
-            self.map_function(idx, line.rstrip('\n'), self.emit_intermediate)
-            # Optional: Update status if needed
+        # Drop the shard text and the emit closure so the only live
+        # reference to the map output is self.map_data; write_data can
+        # then free each partition as soon as it is serialized.
+        del raw, map_data, emit
 
-        self.reducer_ids.sort()
-        active_reducers_queue.put(self.reducer_ids)
-        status_queue.put(['D', time.time()])
         self.write_data()
+        return self.reducer_ids
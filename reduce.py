@@ -1,12 +1,63 @@
+import heapq
+import itertools
 import json
+import mmap
 import os
+import pickle
+import queue
+import sys
+import threading
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Built-in reduction kernels; each one consumes a key's value list in a
+# single C-level call instead of dispatching into a Python reduce
+# function per key.
+_REDUCE_KERNELS = {
+    'sum': sum,
+    'count': len,
+    'max': max,
+    'min': min,
+    'concat': lambda values: values,
+}
+
+# At most this many intermediate streams get a background prefetch
+# thread, sharing _PREFETCH_BUDGET buffered records between them; the
+# remaining streams are read on demand. This keeps reducer threads and
+# buffered records bounded regardless of the mapper count.
+_PREFETCH_STREAMS = 8
+_PREFETCH_BUDGET = 2048
+
+# Kernels that can consume the merged value stream lazily, so a key's
+# values are never materialized as a list of boxed objects at all.
+_STREAMING_KERNELS = {
+    'sum': sum,
+    'max': max,
+    'min': min,
+    'count': lambda values: sum(1 for _ in values),
+}
+
+class ReducerOps:
+    """
+    Built-in reductions that can be passed directly as the job's reduce
+    function, e.g. initialize_master(..., user_defined_reduce=ReducerOps.SUM).
+    They run as single C-level calls per key with no Python callback.
+    """
+    SUM = 'sum'
+    COUNT = 'count'
+    MAX = 'max'
+    MIN = 'min'
+    CONCAT = 'concat'
 
 class Reducer:
     """
     Reducer class that processes intermediate key-value pairs and produces final output.
     """
 
-    def __init__(self, intermediate_dir, output_dir, reduce_function, reducer_id, num_mappers):
+    def __init__(self, intermediate_dir, output_dir, reduce_function, reducer_id, num_mappers, reduce_kind=None):
         """
         Initializes the Reducer.
 
@@ -16,61 +67,172 @@ class Reducer:
             reduce_function (function): User-defined reduce function.
             reducer_id (int): Unique identifier for the reducer.
             num_mappers (int): Total number of mappers.
+            reduce_kind (str): Optional name of a built-in reduction
+                ('sum', 'count', 'max' or 'min') applied directly to each
+                key's values, bypassing the reduce_function callback.
         """
+        if reduce_kind is None and isinstance(reduce_function, str) and reduce_function in _REDUCE_KERNELS:
+            # A ReducerOps constant passed in place of a reduce function.
+            reduce_kind, reduce_function = reduce_function, None
+        if reduce_kind is not None and reduce_kind not in _REDUCE_KERNELS:
+            raise ValueError(f"Unknown reduce_kind '{reduce_kind}', expected one of {sorted(_REDUCE_KERNELS)}")
         self.intermediate_dir = intermediate_dir
         self.output_dir = output_dir
         self.reduce_function = reduce_function
+        self.reduce_kind = reduce_kind
         self.id = reducer_id
         self.num_mappers = num_mappers
-        self.input_data = []
 
-        # Load intermediate data from mappers
-        self.load_intermediate_data()
+    def intermediate_files(self):
+        """
+        Returns the paths of this reducer's existing intermediate files.
 
-    def load_intermediate_data(self):
+        One directory scan replaces a stat per possible mapper id; the
+        'r{id}.pkl' suffix cannot collide between reducers since the
+        character before the matched suffix is always 'r'.
         """
-        Loads intermediate data from all mappers for this reducer.
+        suffix = f'r{self.id}.pkl'
+        try:
+            entries = os.scandir(self.intermediate_dir)
+        except FileNotFoundError:
+            return []
+        with entries:
+            return sorted(entry.path for entry in entries if entry.name.endswith(suffix))
+
+    def read_records(self, file_path):
         """
-        self.final_dict = {}
-        for mapper_id in range(self.num_mappers):
-            file_path = os.path.join(self.intermediate_dir, f'm{mapper_id}r{self.id}.txt')
-            if os.path.exists(file_path):
-                with open(file_path, 'r') as f:
-                    data = json.load(f)
-                    for key, values in data.items():
-                        self.final_dict.setdefault(key, []).extend(values)
-
-    def emit_final(self, key, value):
+        Yields (key, values) records from one mapper's key-sorted file.
+
+        The file is memory-mapped rather than read, so record bytes come
+        straight out of the page cache without an extra userspace copy.
+
+        Args:
+            file_path (str): Path of the intermediate file to stream.
         """
-        Emits the final reduced key-value pair.
+        with open(file_path, 'rb') as f:
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                size = mm.size()
+                while mm.tell() < size:
+                    key, values = pickle.load(mm)
+                    if type(key) is str:
+                        # Up to num_mappers fresh copies of each key arrive
+                        # from the streams; interning collapses them to one
+                        # object so the merge/groupby comparisons hit the
+                        # string identity fast path.
+                        key = sys.intern(key)
+                    yield key, values
+            if hasattr(os, 'posix_fadvise'):
+                # Intermediate files are read exactly once; drop their
+                # pages rather than letting them crowd the cache.
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+
+    def prefetch_records(self, records, depth):
+        """
+        Runs a record stream on a background thread, re-yielding its
+        records from a bounded queue. The file is read and parsed
+        concurrently with the merge loop (the GIL is released during
+        file I/O and inside the C unpickler) instead of strictly on
+        demand.
 
         Args:
-            key: Final key.
-            value: Final value.
+            records (iterator): Stream of (key, values) records.
+            depth (int): Maximum records buffered ahead of the consumer.
         """
-        self.reduced_data[key] = value
+        buffer = queue.Queue(maxsize=depth)
+        end = object()
+
+        def produce():
+            error = None
+            try:
+                for record in records:
+                    buffer.put(record)
+            except Exception as exc:
+                error = exc
+            buffer.put((end, error))
 
-    def write_data(self):
+        threading.Thread(target=produce, daemon=True).start()
+        while True:
+            record = buffer.get()
+            if record[0] is end:
+                if record[1] is not None:
+                    raise record[1]
+                return
+            yield record
+
+    def start_reducer(self):
         """
-        Writes the reduced data to the final output file.
+        Runs the reduce task.
+
+        The mappers emit their records sorted by key, so the reducer
+        merge-sorts the streams with heapq.merge and reduces each key's
+        group as it goes. Results stream straight into the output file as
+        one JSON object per line, so neither the merged values nor the
+        reduced results are ever held in memory as a whole; only one
+        key's values are resident at a time.
         """
+        paths = self.intermediate_files()
+        # The merge consumes the key-sorted streams roughly uniformly, so
+        # prefetching only the first few still overlaps I/O with the merge
+        # while keeping threads and buffered records bounded per reducer.
+        depth = _PREFETCH_BUDGET // min(len(paths), _PREFETCH_STREAMS) if paths else 0
+        streams = [self.prefetch_records(self.read_records(path), depth)
+                   if position < _PREFETCH_STREAMS else self.read_records(path)
+                   for position, path in enumerate(paths)]
+        merged = heapq.merge(*streams, key=lambda record: record[0])
+        grouped = itertools.groupby(merged, key=lambda record: record[0])
+
         os.makedirs(self.output_dir, exist_ok=True)
         out_file = os.path.join(self.output_dir, f'{self.id}.txt')
-        with open(out_file, 'w') as outfile:
-            json.dump(self.reduced_data, outfile)
+        if orjson is not None:
+            # OPT_NON_STR_KEYS coerces non-string keys to strings the way
+            # the stdlib encoder does; keys only have to be sortable, so
+            # plain orjson.dumps would reject e.g. int keys.
+            dumps = lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        else:
+            dumps = lambda obj: json.dumps(obj).encode()
+        with open(out_file, 'wb', buffering=1 << 20) as outfile:
+            write = outfile.write
 
-    def start_reducer(self, status_queue):
+            def emit(key, value):
+                write(dumps({key: value}) + b'\n')
+
+            # The backend is picked once per task; each loop is a single
+            # straight-line code path with no per-group dispatch.
+            if self.reduce_kind is not None:
+                self.reduce_builtin(grouped, emit)
+            else:
+                self.reduce_generic(grouped, emit)
+
+    def reduce_builtin(self, grouped, emit):
         """
-        Starts the reducer process.
+        Reduces the merged groups with the configured built-in kernel.
 
         Args:
-            status_queue (multiprocessing.Queue): Queue to communicate status updates.
+            grouped: Iterator of (key, group) pairs in key order.
+            emit (function): Callback writing a reduced (key, value) pair.
         """
-        self.reduced_data = {}
-        status_queue.put(['I', time.time()])
+        streaming_kernel = _STREAMING_KERNELS.get(self.reduce_kind)
+        if streaming_kernel is not None:
+            for key, group in grouped:
+                emit(key, streaming_kernel(
+                    itertools.chain.from_iterable(values for _, values in group)))
+        else:
+            kernel = _REDUCE_KERNELS[self.reduce_kind]
+            for key, group in grouped:
+                values = list(itertools.chain.from_iterable(values for _, values in group))
+                emit(key, kernel(values))
 
-        for key, values in self.final_dict.items():
-            self.reduce_function(key, values, self.emit_final)
+    def reduce_generic(self, grouped, emit):
+        """
+        Dispatches each merged group to the user reduce function.
 
-        status_queue.put(['D', time.time()])
-        self.write_data()
+        Args:
+            grouped: Iterator of (key, group) pairs in key order.
+            emit (function): Callback writing a reduced (key, value) pair.
+        """
+        reduce_function = self.reduce_function
+        for key, group in grouped:
+            values = list(itertools.chain.from_iterable(values for _, values in group))
+            reduce_function(key, values, emit)
@@ -0,0 +1,48 @@
+import re
+import sys
+from main import read_configs, initialize_master
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def word_count_map(idx, value, emit):
+    """
+    Emits (word, 1) for every normalized word in a line.
+
+    Args:
+        idx (int): Line number within the mapper's shard.
+        value (str): The line contents.
+        emit (function): Callback receiving intermediate key-value pairs.
+    """
+    for word in _WORD_RE.findall(value.lower()):
+        emit(word, 1)
+
+def word_count_reduce(key, values, emit):
+    """
+    Sums the occurrence counts emitted for a word.
+
+    Args:
+        key (str): The word.
+        values (list): Occurrence counts emitted by the mappers.
+        emit (function): Callback receiving the final key-value pair.
+    """
+    emit(key, sum(values))
+
+def word_count_combine(key, values):
+    """
+    Map-side combiner collapsing a word's counts to their sum.
+
+    Args:
+        key (str): The word.
+        values (list): Occurrence counts emitted by the mapper.
+
+    Returns:
+        int: The combined count.
+    """
+    return sum(values)
+
+if __name__ == '__main__':
+    config_file = sys.argv[1] if len(sys.argv) > 1 else 'config.json'
+    kill_idx = int(sys.argv[2]) if len(sys.argv) > 2 else -1
+    input_file, num_mappers, num_reducers = read_configs(config_file)
+    initialize_master(num_mappers, num_reducers, input_file, word_count_map, word_count_reduce, kill_idx,
+                      user_defined_combine=word_count_combine)